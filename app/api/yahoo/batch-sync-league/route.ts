@@ -135,7 +135,7 @@ async function fetchAndSaveGameLog(
 
       if (!isNaN(numValue)) {
         statsObject[statId] = numValue
-        if (statId === '3') minutesPlayed = numValue
+        if (statId === '2') minutesPlayed = numValue
       }
     })
 
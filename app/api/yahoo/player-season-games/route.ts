@@ -235,8 +235,8 @@ export async function GET(request: NextRequest) {
           if (!isNaN(numValue)) {
             statsObject[statId] = numValue
 
-            // Stat ID 3 is typically minutes played (MIN)
-            if (statId === '3') {
+            // Stat ID 2 is minutes played (MIN); 3 is FGA
+            if (statId === '2') {
               minutesPlayed = numValue
             }
           }
@@ -137,7 +137,7 @@ async function fetchGameLogForDate(
 
       if (!isNaN(numValue)) {
         statsObject[statId] = numValue
-        if (statId === '3') {
+        if (statId === '2') {
           minutesPlayed = numValue
         }
       }
@@ -13,21 +13,39 @@
 import os
 import sys
 import json
+import math
+import logging
+import logging.handlers
+import argparse
+import functools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import Callable, List, Dict, Optional
 from tqdm import tqdm
 import time
 
-from yfpy.query import YahooFantasySportsQuery
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError, RequestException
+from urllib3.util.retry import Retry
+
 from supabase import create_client, Client
+from yfpy.exceptions import YahooFantasySportsException
 from dotenv import load_dotenv
 
+from yahoo_auth import get_yahoo_query, has_saved_token
+
 # 載入環境變數
 load_dotenv()
 
+logger = logging.getLogger('backfill')
+
 # Supabase 設定
 SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL')  # 直連 Postgres（選填，--copy 模式使用）
 
 # Yahoo API 設定
 YAHOO_CLIENT_ID = os.getenv('YAHOO_CLIENT_ID')
@@ -40,11 +58,314 @@ SEASONS = {
     '2023-24': {'start': '2023-10-24', 'end': '2024-06-17'},
 }
 
+# Yahoo NBA stat_id 對應的數值型別（比率類為 float，其餘為計數 int；未列出的視為 float）
+NBA_STAT_TYPES: Dict[str, type] = {
+    '0': int,     # GP
+    '1': int,     # GS
+    '2': int,     # MIN
+    '3': int,     # FGA
+    '4': int,     # FGM
+    '5': float,   # FG%
+    '6': int,     # FTA
+    '7': int,     # FTM
+    '8': float,   # FT%
+    '9': int,     # 3PTA
+    '10': int,    # 3PTM
+    '11': float,  # 3PT%
+    '12': int,    # PTS
+    '13': int,    # OREB
+    '14': int,    # DREB
+    '15': int,    # REB
+    '16': int,    # AST
+    '17': int,    # ST
+    '18': int,    # BLK
+    '19': int,    # TO
+    '20': float,  # A/T
+    '21': int,    # PF
+    '27': int,    # DD
+    '28': int,    # TD
+}
+
+# 並行設定
+YAHOO_MAX_WORKERS = 8  # 同時進行的 Yahoo API 請求數
+YAHOO_RATE_LIMIT = 5.0  # 每秒最多 API 調用次數（等同原本的 200ms 間隔）
+YAHOO_POOL_SIZE = 32  # HTTP 連線池大小（需 >= YAHOO_MAX_WORKERS）
+YAHOO_THROTTLE_BACKOFF = 30.0  # 被限流且沒有 Retry-After 時的暫停秒數
+YAHOO_THROTTLE_RETRIES = 3  # 被限流時的重試次數
+YAHOO_LOW_REMAINING = 10  # X-RateLimit-Remaining 低於此值時主動降速
+
+# Supabase 查詢設定
+EXISTING_DATES_KEY_CHUNK = 200  # 每次 in_() 查詢的 player_key 數（避免 URL 過長）
+SUPABASE_PAGE_SIZE = 1000  # PostgREST 單次回傳上限
+
+# player_game_logs 寫入欄位
+# opponent / home_away / game_result 目前無資料來源，不寫入以縮小資料列，
+# 也避免覆蓋其他同步流程已寫入的值
+GAME_LOG_COLUMNS = ('player_key', 'player_name', 'game_date', 'stats', 'minutes_played')
+
+# 本地快取設定
+CACHE_DIR = Path(__file__).resolve().parent / '.cache'
+ROSTER_CACHE_TTL = 86400  # 球員列表快取有效時間（秒）
+
+# 常駐模式設定
+DAEMON_INTERVAL = 86400  # 每輪同步間隔（秒）
+DAEMON_LOOKBACK_DAYS = 7  # 常駐模式第二輪起只檢查最近幾天
+
+
+def disk_cache(name: str, ttl: int):
+    """
+    將收集器方法的結果以 JSON 快取到磁碟
+
+    快取檔以 (league_id, season) 區分，呼叫時傳入 refresh=True 可強制重新抓取。
+    空結果（抓取失敗）不會寫入快取。
+
+    Args:
+        name: 快取名稱（檔名的一部分）
+        ttl: 快取有效時間（秒）
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, refresh: bool = False, **kwargs):
+            path = CACHE_DIR / f"league_{self.league_id}_{self.season}_{name}.json"
+
+            if not refresh and path.exists() and time.time() - path.stat().st_mtime < ttl:
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        return json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️  快取讀取失敗，重新抓取 ({path.name}): {e}")
+
+            result = func(self, *args, **kwargs)
+
+            if result:
+                try:
+                    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    with open(path, 'w', encoding='utf-8') as f:
+                        json.dump(result, f, ensure_ascii=False)
+                except (OSError, TypeError) as e:
+                    logger.warning(f"⚠️  快取寫入失敗 ({path.name}): {e}")
+
+            return result
+        return wrapper
+    return decorator
+
+
+def build_date_range(start_date: str, end_date: str) -> List[str]:
+    """
+    產生日期範圍（結束日期不超過今天）
+
+    Args:
+        start_date: 起始日期 (YYYY-MM-DD)
+        end_date: 結束日期 (YYYY-MM-DD)
+
+    Returns:
+        日期字串列表
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = min(datetime.strptime(end_date, '%Y-%m-%d'), datetime.now())
+
+    return [
+        (start + timedelta(days=i)).strftime('%Y-%m-%d')
+        for i in range((end - start).days + 1)
+    ]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After header（只支援秒數格式）
+
+    Args:
+        value: header 原始值
+
+    Returns:
+        秒數或 None
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class TqdmLoggingHandler(logging.Handler):
+    """透過 tqdm.write 輸出 log，避免打斷進度條"""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            tqdm.write(self.format(record), file=sys.stderr)
+        except Exception:
+            self.handleError(record)
+
+
+def setup_logging(capacity: int = 100):
+    """
+    設定 log 輸出：先緩衝在記憶體，累積 capacity 筆或遇到 ERROR 時才一次輸出
+
+    Args:
+        capacity: 緩衝筆數
+    """
+    target = TqdmLoggingHandler()
+    target.setFormatter(logging.Formatter('%(message)s'))
+
+    logger.addHandler(logging.handlers.MemoryHandler(
+        capacity,
+        flushLevel=logging.ERROR,
+        target=target
+    ))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def flush_logs():
+    """立即輸出緩衝中的 log"""
+    for handler in logger.handlers:
+        handler.flush()
+
+
+class RateLimiter:
+    """
+    自適應 token bucket 限速器（可在多個執行緒之間共用）
+
+    被限流時速率減半並暫停所有請求，之後每次成功逐步恢復到上限（AIMD）。
+    """
+
+    def __init__(self, rate: float, capacity: int = 1, min_rate: Optional[float] = None):
+        """
+        初始化限速器
+
+        Args:
+            rate: 每秒補充的 token 數（速率上限）
+            capacity: bucket 容量（允許的瞬間爆發量）
+            min_rate: 降速的下限（預設為上限的 1/10）
+        """
+        self.rate = rate
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取得一個 token，不足或暫停中時等待"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+
+                    wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def throttle(self, delay: float = 0.0):
+        """
+        被限流（或額度將盡）：速率減半，並暫停所有請求 delay 秒
+
+        Args:
+            delay: 暫停秒數
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.updated = now
+            self.blocked_until = max(self.blocked_until, now + delay)
+
+    def recover(self):
+        """請求成功：逐步恢復速率"""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def build_game_log_row(player_key: str, player_name: str, game_log: Dict) -> Dict:
+    """
+    將 get_player_stats_by_date 的結果轉為 player_game_logs 的資料列
+
+    Args:
+        player_key: 球員 key
+        player_name: 球員姓名
+        game_log: 比賽數據
+
+    Returns:
+        player_game_logs 資料列
+    """
+    return {
+        'player_key': player_key,
+        'player_name': player_name,
+        'game_date': game_log['date'],
+        'stats': game_log['stats'],
+        'minutes_played': game_log.get('minutes_played')
+    }
+
+
+class GameLogWriter(threading.Thread):
+    """
+    背景寫入執行緒：從 queue 取出比賽紀錄，每 chunk 筆批次寫入
+
+    讓 Supabase 寫入與 Yahoo API 抓取同時進行，抓取端不必等待寫入完成。
+    """
+
+    def __init__(self, save: Callable[[List[Dict], int], int], chunk: int = 500):
+        """
+        初始化寫入執行緒
+
+        Args:
+            save: 批次寫入函式（回傳成功筆數）
+            chunk: 每次批次寫入的筆數
+        """
+        super().__init__(daemon=True)
+        self.save = save
+        self.chunk = chunk
+        self.queue: queue.Queue = queue.Queue()
+        self.saved = 0
+        self.failed = 0
+
+    def put(self, row: Dict):
+        """加入一筆待寫入的比賽紀錄"""
+        self.queue.put(row)
+
+    def close(self):
+        """寫入剩餘資料並等待執行緒結束"""
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        buffer = []
+        while True:
+            row = self.queue.get()
+            if row is not None:
+                buffer.append(row)
+
+            if buffer and (row is None or len(buffer) >= self.chunk):
+                saved = self.save(buffer, self.chunk)
+                self.saved += saved
+                self.failed += len(buffer) - saved
+                buffer = []
+
+            if row is None:
+                return
+
 
 class YahooDataCollector:
     """Yahoo Fantasy 資料收集器"""
 
-    def __init__(self, league_id: str, game_code: str = 'nba', season: int = 2025):
+    def __init__(
+        self,
+        league_id: str,
+        game_code: str = 'nba',
+        season: int = 2025,
+        max_workers: int = YAHOO_MAX_WORKERS,
+        use_copy: bool = False
+    ):
         """
         初始化收集器
 
@@ -52,6 +373,8 @@ class YahooDataCollector:
             league_id: Yahoo 聯盟 ID
             game_code: 運動類別代碼 (nba, nfl, mlb, nhl)
             season: 賽季年份
+            max_workers: 同時進行的 Yahoo API 請求數
+            use_copy: 是否透過 Postgres COPY 直接寫入（需要 SUPABASE_DB_URL）
         """
         self.league_id = league_id
         self.game_code = game_code
@@ -63,20 +386,119 @@ class YahooDataCollector:
 
         self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-        # 初始化 Yahoo Fantasy Query
-        self.yahoo = YahooFantasySportsQuery(
-            league_id=league_id,
-            game_code=game_code,
-            game_id=season,
-            yahoo_consumer_key=YAHOO_CLIENT_ID,
-            yahoo_consumer_secret=YAHOO_CLIENT_SECRET
+        # 直連 Postgres（COPY 模式），未設定 SUPABASE_DB_URL 時使用 PostgREST
+        self.db_conn = None
+        if use_copy:
+            if SUPABASE_DB_URL:
+                import psycopg
+                self.db_conn = psycopg.connect(SUPABASE_DB_URL)
+                print("✓ 使用 Postgres COPY 寫入")
+            else:
+                print("⚠️  未設定 SUPABASE_DB_URL，改用 PostgREST upsert")
+
+        # 初始化 Yahoo Fantasy Query（重用已儲存的 token）
+        self.yahoo = get_yahoo_query(league_id, game_code, season)
+
+        # 共用的 HTTP 連線池（重用 TLS 連線，避免每次請求重新握手）
+        # 限流回應（429 / 999）不在此重試，交給 response hook 與 _fetch_player_stats 處理
+        self.http_adapter = HTTPAdapter(
+            pool_connections=YAHOO_POOL_SIZE,
+            pool_maxsize=YAHOO_POOL_SIZE,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504]
+            )
         )
+        self._pooled_session = None
+        self._session_lock = threading.Lock()
+        # 各執行緒最近一次請求是否被限流（由 response hook 設定）
+        self._throttle_state = threading.local()
+        self._ensure_pooled_session()
+
+        # 共用的執行緒池與限速器（避免每個球員重新建立執行緒）
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.rate_limiter = RateLimiter(YAHOO_RATE_LIMIT)
 
         print(f"✓ 初始化完成: {game_code}.l.{league_id} ({season})")
 
+    def _ensure_pooled_session(self):
+        """
+        將共用的 HTTPAdapter 掛到 yfpy 底層的 requests session
+
+        yfpy 透過 yahoo_oauth 的 session 發送請求，token 更新時會換成新的
+        session，因此每次請求前確認一次（只比對物件是否相同）。
+        """
+        oauth = getattr(self.yahoo, 'oauth', None)
+        session = getattr(oauth, 'session', None)
+
+        if session is None or session is self._pooled_session:
+            return
+
+        # 多個執行緒可能同時發現新的 session，只能掛載一次 hook
+        with self._session_lock:
+            if session is self._pooled_session:
+                return
+
+            session.mount('https://', self.http_adapter)
+            if self._on_yahoo_response not in session.hooks['response']:
+                session.hooks['response'].append(self._on_yahoo_response)
+            self._pooled_session = session
+
+    def _on_yahoo_response(self, response, *args, **kwargs):
+        """
+        依 Yahoo 回應調整限速
+
+        Yahoo 被限流時回傳 999（或 429），依 Retry-After 暫停；
+        X-RateLimit-Remaining 偏低時主動降速，只有成功的回應才逐步恢復速率。
+        """
+        if response.status_code in (429, 999):
+            self._throttle_state.throttled = True
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            self.rate_limiter.throttle(
+                retry_after if retry_after is not None else YAHOO_THROTTLE_BACKOFF
+            )
+            return
+
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is not None and remaining.isdigit() and int(remaining) <= YAHOO_LOW_REMAINING:
+            self.rate_limiter.throttle()
+        elif 200 <= response.status_code < 300:
+            self.rate_limiter.recover()
+
+    def _fetch_player_stats(self, player_key: str, date: str):
+        """
+        透過 yfpy 取得球員特定日期的原始數據（被限流時等待後重試）
+
+        Args:
+            player_key: 球員 key
+            date: 日期 (YYYY-MM-DD)
+
+        Returns:
+            yfpy Player 物件
+        """
+        for attempt in range(YAHOO_THROTTLE_RETRIES + 1):
+            self.rate_limiter.acquire()
+            self._ensure_pooled_session()
+            self._throttle_state.throttled = False
+
+            try:
+                return self.yahoo.get_player_stats_by_date(player_key, date)
+            except HTTPError:
+                # 只重試被限流的請求；response hook 已依 Retry-After 暫停限速器，
+                # 下一輪 acquire 會等待
+                if not self._throttle_state.throttled or attempt == YAHOO_THROTTLE_RETRIES:
+                    raise
+
+    @functools.cached_property
+    def league_info(self):
+        """聯盟資訊（第一次存取時才向 Yahoo 查詢，之後重用同一份結果）"""
+        return self.yahoo.get_league_info()
+
+    @disk_cache('players', ttl=ROSTER_CACHE_TTL)
     def get_league_players(self) -> List[Dict]:
         """
-        取得聯盟所有球員列表
+        取得聯盟所有球員列表（結果快取於 .cache/，傳入 refresh=True 可重新抓取）
 
         Returns:
             球員列表 (包含 player_key 和 player_name)
@@ -85,7 +507,6 @@ class YahooDataCollector:
 
         try:
             # 使用 yfpy 獲取聯盟球員
-            league = self.yahoo.get_league_info()
             players = self.yahoo.get_league_players()
 
             player_list = []
@@ -93,7 +514,7 @@ class YahooDataCollector:
                 player_list.append({
                     'player_key': player.player_key,
                     'player_name': player.name.full,
-                    'team': getattr(player.editorial_team_abbr, 'value', 'UNK') if hasattr(player, 'editorial_team_abbr') else 'UNK',
+                    'team': getattr(player, 'editorial_team_abbr', '') or 'UNK',
                     'positions': player.eligible_positions if hasattr(player, 'eligible_positions') else []
                 })
 
@@ -101,7 +522,7 @@ class YahooDataCollector:
             return player_list
 
         except Exception as e:
-            print(f"✗ 獲取球員列表失敗: {e}")
+            logger.error(f"✗ 獲取球員列表失敗: {e}")
             return []
 
     def get_player_stats_by_date(self, player_key: str, date: str) -> Optional[Dict]:
@@ -113,206 +534,270 @@ class YahooDataCollector:
             date: 日期 (YYYY-MM-DD)
 
         Returns:
-            球員數據或 None
+            球員數據或 None（當天沒有比賽）
+
+        Raises:
+            RequestException / YahooFantasySportsException: API 呼叫失敗
         """
-        try:
-            # 使用 yfpy 獲取球員特定日期的數據
-            stats = self.yahoo.get_player_stats_by_date(player_key, date)
-
-            if not stats or not hasattr(stats, 'player_stats'):
-                return None
-
-            # 解析統計數據
-            stats_dict = {}
-            if hasattr(stats.player_stats, 'stats'):
-                for stat in stats.player_stats.stats:
-                    if hasattr(stat, 'stat'):
-                        stat_id = str(stat.stat.stat_id)
-                        value = stat.stat.value
-
-                        # 嘗試轉換為數字
-                        try:
-                            if '.' in value:
-                                stats_dict[stat_id] = float(value)
-                            else:
-                                stats_dict[stat_id] = int(value)
-                        except (ValueError, TypeError):
-                            # 如果無法轉換，跳過
-                            continue
-
-            # 檢查是否有比賽（至少有一個非零數據）
-            has_game = any(v > 0 for v in stats_dict.values() if isinstance(v, (int, float)))
-
-            if not has_game:
-                return None
-
-            # 提取上場時間（stat_id = 3）
-            minutes_played = stats_dict.get('3')
-
-            return {
-                'date': date,
-                'stats': stats_dict,
-                'minutes_played': minutes_played,
-                'has_game': True
-            }
+        # 使用 yfpy 獲取球員特定日期的數據（API 錯誤交由呼叫端計入統計）
+        stats = self._fetch_player_stats(player_key, date)
 
-        except Exception as e:
-            # 靜默失敗（某些日期沒有比賽是正常的）
+        # 沒有數據時直接回傳，不依賴例外處理
+        player_stats = getattr(stats, 'player_stats', None)
+        stat_list = getattr(player_stats, 'stats', None)
+        if not stat_list:
+            return None
+
+        # 解析統計數據，同時檢查是否有比賽（至少有一個非零數據）
+        # 目前的 yfpy 直接回傳 Stat；部分版本會再包一層 stat（只需判斷一次）
+        if hasattr(stat_list[0], 'stat'):
+            stat_list = [item.stat for item in stat_list]
+
+        stats_dict = {}
+        has_game = False
+        for stat in stat_list:
+            stat_id = str(stat.stat_id)
+            caster = NBA_STAT_TYPES.get(stat_id, float)
+
+            # 無法轉換的值（例如 '-'、'5/10'、None）直接跳過
+            try:
+                number = caster(stat.value)
+            except (TypeError, ValueError):
+                continue
+
+            if caster is float and not math.isfinite(number):
+                continue
+
+            stats_dict[stat_id] = number
+            if number > 0:
+                has_game = True
+
+        if not has_game:
             return None
 
-    def save_game_log(self, player_key: str, player_name: str, game_log: Dict) -> bool:
+        # 提取上場時間（stat_id = 2）
+        minutes_played = stats_dict.get('2')
+
+        return {
+            'date': date,
+            'stats': stats_dict,
+            'minutes_played': minutes_played,
+            'has_game': True
+        }
+
+    def save_game_logs_bulk(self, rows: List[Dict], chunk: int = 500) -> int:
         """
-        儲存比賽紀錄到 Supabase
+        批次儲存比賽紀錄到 Supabase（每 chunk 筆一次 upsert）
 
         Args:
-            player_key: 球員 key
-            player_name: 球員姓名
-            game_log: 比賽數據
+            rows: 比賽紀錄列表 (player_game_logs 的資料列)
+            chunk: 每次 upsert 的筆數
 
         Returns:
-            是否成功儲存
+            成功寫入的筆數
         """
-        try:
-            data = {
-                'player_key': player_key,
-                'player_name': player_name,
-                'game_date': game_log['date'],
-                'stats': game_log['stats'],
-                'minutes_played': game_log.get('minutes_played'),
-                'opponent': None,  # 未來可從 schedule API 取得
-                'home_away': None,
-                'game_result': None
-            }
+        if self.db_conn:
+            return self._copy_game_logs(rows)
 
-            # 使用 upsert 避免重複
-            result = self.supabase.table('player_game_logs').upsert(
-                data,
-                on_conflict='player_key,game_date'
-            ).execute()
+        saved = 0
+        for i in range(0, len(rows), chunk):
+            chunk_rows = rows[i:i + chunk]
+            try:
+                # 使用 upsert 避免重複
+                response = self.supabase.table('player_game_logs').upsert(
+                    chunk_rows,
+                    on_conflict='player_key,game_date'
+                ).execute()
 
-            return True
+                saved += len(response.data)
 
-        except Exception as e:
-            print(f"✗ 儲存失敗 ({player_key}, {game_log['date']}): {e}")
-            return False
+            except Exception as e:
+                logger.error(f"✗ 批次儲存失敗 ({len(chunk_rows)} 筆): {e}")
+
+        return saved
+
+    def _ensure_db_conn(self):
+        """
+        確認 Postgres 連線仍可使用，已關閉或中斷時重新連線
+
+        常駐模式兩輪之間連線會閒置很久，可能已被伺服器或 NAT 切斷。
+        """
+        if not self.db_conn.closed and not self.db_conn.broken:
+            return
 
-    def get_existing_dates(self, player_key: str) -> set:
+        import psycopg
+        logger.warning("⚠️  Postgres 連線已中斷，重新連線")
+        self.db_conn = psycopg.connect(SUPABASE_DB_URL)
+
+    def _copy_game_logs(self, rows: List[Dict]) -> int:
         """
-        取得資料庫中已存在的日期
+        以 COPY 將比賽紀錄寫入暫存表，再合併到 player_game_logs
 
         Args:
-            player_key: 球員 key
+            rows: 比賽紀錄列表 (player_game_logs 的資料列)
 
         Returns:
-            已存在的日期集合
+            成功寫入的筆數
         """
-        try:
-            result = self.supabase.table('player_game_logs')\
-                .select('game_date')\
-                .eq('player_key', player_key)\
-                .execute()
+        columns = ', '.join(GAME_LOG_COLUMNS)
+        updates = ', '.join(
+            f"{col} = EXCLUDED.{col}"
+            for col in GAME_LOG_COLUMNS if col not in ('player_key', 'game_date')
+        )
 
-            return {row['game_date'] for row in result.data}
+        try:
+            self._ensure_db_conn()
+            with self.db_conn.transaction(), self.db_conn.cursor() as cur:
+                cur.execute(
+                    "CREATE TEMP TABLE tmp_player_game_logs "
+                    "(LIKE player_game_logs INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+
+                with cur.copy(f"COPY tmp_player_game_logs ({columns}) FROM STDIN") as cp:
+                    for row in rows:
+                        cp.write_row(tuple(
+                            json.dumps(row[col]) if col == 'stats' else row.get(col)
+                            for col in GAME_LOG_COLUMNS
+                        ))
+
+                cur.execute(
+                    f"INSERT INTO player_game_logs ({columns}) "
+                    f"SELECT {columns} FROM tmp_player_game_logs "
+                    f"ON CONFLICT (player_key, game_date) DO UPDATE SET {updates}"
+                )
+                return cur.rowcount
 
         except Exception as e:
-            print(f"✗ 查詢現有資料失敗: {e}")
-            return set()
+            logger.error(f"✗ COPY 寫入失敗 ({len(rows)} 筆): {e}")
+            return 0
 
-    def backfill_player(
-        self,
-        player_key: str,
-        player_name: str,
-        start_date: str,
-        end_date: str,
-        skip_existing: bool = True
-    ) -> Dict:
+    def upsert_players(self, players: List[Dict]) -> int:
         """
-        回填單一球員的歷史資料
+        寫入球員基本資料到 players 表（每個球員一筆）
 
         Args:
-            player_key: 球員 key
-            player_name: 球員姓名
-            start_date: 起始日期
-            end_date: 結束日期
-            skip_existing: 是否跳過已存在的資料
+            players: 球員列表 (get_league_players 的結果)
 
         Returns:
-            統計結果
+            成功寫入的筆數
         """
-        # 產生日期範圍
-        start = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        today = datetime.now()
-
-        if end > today:
-            end = today
-
-        dates = []
-        current = start
-        while current <= end:
-            dates.append(current.strftime('%Y-%m-%d'))
-            current += timedelta(days=1)
-
-        # 如果跳過已存在的資料，先查詢
-        existing_dates = set()
-        if skip_existing:
-            existing_dates = self.get_existing_dates(player_key)
-            dates = [d for d in dates if d not in existing_dates]
-
-        # 統計
-        stats = {
-            'player_key': player_key,
-            'player_name': player_name,
-            'total_dates': len(dates),
-            'existing_games': len(existing_dates),
-            'new_games': 0,
-            'api_calls': 0,
-            'errors': 0
-        }
+        rows = [
+            {
+                'player_key': p['player_key'],
+                'player_name': p['player_name'],
+                'team': p.get('team'),
+                'positions': p.get('positions')
+            }
+            for p in players
+        ]
+
+        try:
+            response = self.supabase.table('players').upsert(
+                rows,
+                on_conflict='player_key'
+            ).execute()
 
-        if len(dates) == 0:
-            return stats
+            return len(response.data)
 
-        # 批次收集
-        for date in dates:
-            game_log = self.get_player_stats_by_date(player_key, date)
-            stats['api_calls'] += 1
+        except Exception as e:
+            logger.error(f"✗ 儲存球員資料失敗: {e}")
+            return 0
 
-            if game_log:
-                if self.save_game_log(player_key, player_name, game_log):
-                    stats['new_games'] += 1
-                else:
-                    stats['errors'] += 1
+    def get_existing_dates_bulk(
+        self,
+        player_keys: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Dict[str, set]:
+        """
+        一次取得多個球員在資料庫中已存在的日期
 
-            # Rate limiting: 200ms 延遲
-            time.sleep(0.2)
+        Args:
+            player_keys: 球員 key 列表
+            start_date: 只查詢此日期（含）之後（None = 不限）
+            end_date: 只查詢此日期（含）之前（None = 不限）
 
-        return stats
+        Returns:
+            player_key -> 已存在日期集合（查詢失敗的球員不會出現在結果中）
+        """
+        existing = {}
+
+        for i in range(0, len(player_keys), EXISTING_DATES_KEY_CHUNK):
+            chunk = player_keys[i:i + EXISTING_DATES_KEY_CHUNK]
+            chunk_dates = {player_key: set() for player_key in chunk}
+            offset = 0
+            try:
+                while True:
+                    query = self.supabase.table('player_game_logs')\
+                        .select('player_key,game_date')\
+                        .in_('player_key', chunk)
+                    if start_date:
+                        query = query.gte('game_date', start_date)
+                    if end_date:
+                        query = query.lte('game_date', end_date)
+
+                    # 分頁需要固定排序，否則各頁可能重複或遺漏
+                    result = query\
+                        .order('player_key')\
+                        .order('game_date')\
+                        .range(offset, offset + SUPABASE_PAGE_SIZE - 1)\
+                        .execute()
+
+                    for row in result.data:
+                        chunk_dates[row['player_key']].add(row['game_date'])
+
+                    if len(result.data) < SUPABASE_PAGE_SIZE:
+                        break
+                    offset += SUPABASE_PAGE_SIZE
+
+            except Exception as e:
+                # 查不到就不知道哪些日期已存在，不能當成「全部缺漏」
+                logger.error(f"✗ 批次查詢現有資料失敗（{len(chunk)} 個球員）: {e}")
+                continue
+
+            existing.update(chunk_dates)
+
+        return existing
 
     def backfill_season(
         self,
         season_key: str = '2024-25',
-        max_players: Optional[int] = None
+        max_players: Optional[int] = None,
+        refresh_roster: bool = False,
+        chunk: int = 500,
+        recent_days: Optional[int] = None
     ):
         """
         回填整個賽季的資料
 
+        所有球員的缺漏日期攤平成 (球員, 日期) 任務，交給共用的執行緒池並行抓取
+        （整體速率由限速器控制）；抓到的比賽紀錄交給背景寫入執行緒，
+        累積到 chunk 筆才寫入一次，每次寫入即一個 transaction。
+
         Args:
             season_key: 賽季代碼 (例如: '2024-25')
             max_players: 最多處理球員數量（None = 全部）
+            refresh_roster: 是否忽略球員列表快取
+            chunk: 每次批次寫入的筆數
+            recent_days: 只檢查最近幾天（None = 整個賽季）
         """
         if season_key not in SEASONS:
             print(f"✗ 無效的賽季: {season_key}")
             return
 
         season_info = SEASONS[season_key]
+        start_date = season_info['start']
+        if recent_days is not None:
+            recent_start = (datetime.now() - timedelta(days=recent_days)).strftime('%Y-%m-%d')
+            start_date = max(start_date, recent_start)
+
         print(f"\n{'='*60}")
         print(f"🏀 開始回填 {season_key} 賽季")
-        print(f"📅 日期範圍: {season_info['start']} 至 {season_info['end']}")
+        print(f"📅 日期範圍: {start_date} 至 {season_info['end']}")
         print(f"{'='*60}\n")
 
         # 取得球員列表
-        players = self.get_league_players()
+        players = self.get_league_players(refresh=refresh_roster)
 
         if not players:
             print("✗ 無法取得球員列表")
@@ -322,44 +807,102 @@ class YahooDataCollector:
             players = players[:max_players]
             print(f"ℹ️  限制處理前 {max_players} 個球員\n")
 
+        # 球員基本資料只需寫入一次
+        self.upsert_players(players)
+
+        # 日期範圍對所有球員相同，只產生一次
+        dates = build_date_range(start_date, season_info['end'])
+        date_set = set(dates)
+
+        # 一次查詢所有球員已存在的日期
+        existing_map = self.get_existing_dates_bulk(
+            [p['player_key'] for p in players],
+            start_date=start_date,
+            end_date=season_info['end']
+        )
+
+        # 查詢失敗的球員這一輪先跳過，避免整季日期重抓
+        unknown = [p for p in players if p['player_key'] not in existing_map]
+        if unknown:
+            logger.warning(f"⚠️  {len(unknown)} 個球員無法取得已存在日期，本次略過")
+            players = [p for p in players if p['player_key'] in existing_map]
+
         # 總計統計
         total_stats = {
             'total_players': len(players),
             'processed_players': 0,
             'total_new_games': 0,
             'total_api_calls': 0,
-            'total_errors': 0
+            'total_errors': 0,
+            'total_write_failures': 0
         }
 
-        # 逐一處理每個球員
-        for i, player in enumerate(players, 1):
+        # 攤平成 (球員, 日期) 任務，並記錄每個球員剩餘的任務數
+        remaining = {}
+        tasks = []
+        for player in players:
             player_key = player['player_key']
-            player_name = player['player_name']
-
-            print(f"\n[{i}/{len(players)}] {player_name} ({player_key})")
-            print("-" * 60)
-
-            # 回填球員資料
-            stats = self.backfill_player(
-                player_key=player_key,
-                player_name=player_name,
-                start_date=season_info['start'],
-                end_date=season_info['end'],
-                skip_existing=True
-            )
+            missing = sorted(date_set.difference(existing_map[player_key]))
+
+            remaining[player_key] = len(missing)
+            tasks.extend((player, d) for d in missing)
+
+        # 已經完整的球員不需要抓取
+        total_stats['processed_players'] = sum(1 for n in remaining.values() if n == 0)
+
+        print(f"ℹ️  共 {len(tasks)} 個待抓取的 (球員, 日期)\n")
 
-            # 更新總計
-            total_stats['processed_players'] += 1
-            total_stats['total_new_games'] += stats['new_games']
-            total_stats['total_api_calls'] += stats['api_calls']
-            total_stats['total_errors'] += stats['errors']
+        writer = GameLogWriter(self.save_game_logs_bulk, chunk)
+        writer.start()
+        pbar = tqdm(total=len(tasks), unit='req')
+        collected = 0
+        futures = {}
 
-            # 顯示進度
-            print(f"  已存在: {stats['existing_games']} 場")
-            print(f"  新增: {stats['new_games']} 場")
-            print(f"  API 調用: {stats['api_calls']} 次")
-            if stats['errors'] > 0:
-                print(f"  ⚠️  錯誤: {stats['errors']} 個")
+        try:
+            futures = {
+                self.executor.submit(self.get_player_stats_by_date, player['player_key'], d): (player, d)
+                for player, d in tasks
+            }
+
+            for future in as_completed(futures):
+                player, date = futures[future]
+                total_stats['total_api_calls'] += 1
+
+                try:
+                    game_log = future.result()
+                except (RequestException, YahooFantasySportsException) as e:
+                    game_log = None
+                    total_stats['total_errors'] += 1
+                    logger.warning(f"✗ 取得數據失敗 ({player['player_name']}, {date}): {e}")
+                except Exception:
+                    # 非預期的回應格式等錯誤只影響這一天，不中斷整個賽季
+                    game_log = None
+                    total_stats['total_errors'] += 1
+                    logger.exception(f"✗ 處理數據時發生未預期錯誤 ({player['player_name']}, {date})")
+
+                if game_log:
+                    writer.put(build_game_log_row(player['player_key'], player['player_name'], game_log))
+                    collected += 1
+
+                remaining[player['player_key']] -= 1
+                if remaining[player['player_key']] == 0:
+                    total_stats['processed_players'] += 1
+
+                pbar.update(1)
+                pbar.set_postfix(new=collected, err=total_stats['total_errors'], refresh=False)
+
+        finally:
+            # 提前結束時取消尚未執行的任務，避免佔用下一輪的限速額度
+            for future in futures:
+                future.cancel()
+
+            pbar.close()
+            flush_logs()
+
+            # 即使中斷也把已抓到的資料寫入
+            writer.close()
+            total_stats['total_new_games'] += writer.saved
+            total_stats['total_write_failures'] += writer.failed
 
         # 最終統計
         print(f"\n{'='*60}")
@@ -369,11 +912,63 @@ class YahooDataCollector:
         print(f"新增比賽: {total_stats['total_new_games']} 場")
         print(f"API 調用: {total_stats['total_api_calls']} 次")
         print(f"錯誤: {total_stats['total_errors']} 個")
+        print(f"寫入失敗: {total_stats['total_write_failures']} 筆")
         print(f"{'='*60}\n")
 
+    def close(self):
+        """釋放執行緒池與資料庫連線"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.db_conn:
+            self.db_conn.close()
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令列參數"""
+    parser = argparse.ArgumentParser(description='Yahoo Fantasy Basketball 資料回填工具')
+    parser.add_argument('league_id', nargs='?', help='Yahoo 聯盟 ID（預設讀取 YAHOO_LEAGUE_ID）')
+    parser.add_argument('season', nargs='?', default='2024-25', help='賽季代碼（預設 2024-25）')
+    parser.add_argument('max_players', nargs='?', type=int, help='最多處理球員數（測試用）')
+    parser.add_argument('--refresh-roster', action='store_true', help='忽略球員列表快取，重新抓取')
+    parser.add_argument('--copy', action='store_true',
+                        help='透過 Postgres COPY 直接寫入（需要 SUPABASE_DB_URL，適合首次大量回填）')
+    parser.add_argument('--daemon', action='store_true', help='常駐模式：重複執行同步，重用連線與快取')
+    parser.add_argument('--interval', type=int, default=DAEMON_INTERVAL,
+                        help=f'常駐模式每輪間隔秒數（預設 {DAEMON_INTERVAL}）')
+    parser.add_argument('--lookback', type=int, default=DAEMON_LOOKBACK_DAYS,
+                        help=f'常駐模式第二輪起只檢查最近幾天（預設 {DAEMON_LOOKBACK_DAYS}）')
+    return parser.parse_args()
+
+
+def run_once(
+    collector: YahooDataCollector,
+    season_key: str,
+    max_players: Optional[int] = None,
+    refresh_roster: bool = False,
+    recent_days: Optional[int] = None
+):
+    """
+    執行一輪回填
+
+    Args:
+        collector: 已初始化的收集器（在多輪之間重用）
+        season_key: 賽季代碼
+        max_players: 最多處理球員數量（None = 全部）
+        refresh_roster: 是否忽略球員列表快取
+        recent_days: 只檢查最近幾天（None = 整個賽季）
+    """
+    collector.backfill_season(
+        season_key=season_key,
+        max_players=max_players,
+        refresh_roster=refresh_roster,
+        recent_days=recent_days
+    )
+
 
 def main():
     """主程式"""
+    args = parse_args()
+    setup_logging()
 
     print("\n" + "="*60)
     print("🏀 Yahoo Fantasy Basketball 資料回填工具")
@@ -390,9 +985,7 @@ def main():
         sys.exit(1)
 
     # 取得聯盟 ID（從命令列參數或環境變數）
-    league_id = os.getenv('YAHOO_LEAGUE_ID')
-    if len(sys.argv) > 1:
-        league_id = sys.argv[1]
+    league_id = args.league_id or os.getenv('YAHOO_LEAGUE_ID')
 
     if not league_id:
         print("✗ 請提供聯盟 ID")
@@ -400,30 +993,37 @@ def main():
         print("  或設定環境變數: YAHOO_LEAGUE_ID")
         sys.exit(1)
 
-    # 取得賽季參數
-    season_key = sys.argv[2] if len(sys.argv) > 2 else '2024-25'
+    season_key = args.season
+    max_players = args.max_players
 
-    # 取得最大球員數
-    max_players = None
-    if len(sys.argv) > 3:
-        try:
-            max_players = int(sys.argv[3])
-        except ValueError:
-            pass
+    if has_saved_token():
+        print("🔐 使用已儲存的 Yahoo token")
+    else:
+        print("🔐 首次授權：將開啟瀏覽器進行 Yahoo OAuth")
 
+    collector = None
     try:
         # 初始化收集器
         collector = YahooDataCollector(
             league_id=league_id,
             game_code='nba',
-            season=2025
+            season=2025,
+            use_copy=args.copy
         )
 
         # 開始回填
-        collector.backfill_season(
-            season_key=season_key,
-            max_players=max_players
-        )
+        run_once(collector, season_key, max_players, args.refresh_roster)
+
+        # 常駐模式：重用同一個收集器（連線池、token、Supabase client）
+        # 第一輪已補齊整季，之後只需檢查最近幾天（沒有比賽的日期每輪都會查不到資料）
+        while args.daemon:
+            print(f"💤 {args.interval} 秒後執行下一輪...")
+            time.sleep(args.interval)
+
+            try:
+                run_once(collector, season_key, max_players, recent_days=args.lookback)
+            except Exception as e:
+                print(f"\n✗ 本輪執行失敗: {e}")
 
     except KeyboardInterrupt:
         print("\n\n⚠️  使用者中斷")
@@ -433,6 +1033,9 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if collector:
+            collector.close()
 
 
 if __name__ == '__main__':
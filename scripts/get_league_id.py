@@ -6,7 +6,8 @@ Helper script to get your Yahoo Fantasy Basketball league ID
 import os
 import sys
 from dotenv import load_dotenv
-from yfpy.query import YahooFantasySportsQuery
+
+from yahoo_auth import get_yahoo_query, has_saved_token
 
 # Load environment variables
 load_dotenv()
@@ -27,21 +28,18 @@ def get_user_leagues():
         sys.exit(1)
 
     try:
-        # Initialize Yahoo Fantasy Query for current season (2025)
-        yahoo = YahooFantasySportsQuery(
-            league_id=None,  # Not needed for getting user's leagues
-            game_code='nba',
-            game_id=2025,
-            yahoo_consumer_key=YAHOO_CLIENT_ID,
-            yahoo_consumer_secret=YAHOO_CLIENT_SECRET
-        )
-
-        print("🔐 Authenticating with Yahoo...")
-        print("   (A browser window will open for OAuth authorization)")
+        if has_saved_token():
+            print("🔐 Using saved Yahoo token")
+        else:
+            print("🔐 Authenticating with Yahoo...")
+            print("   (A browser window will open for OAuth authorization)")
         print()
 
+        # Initialize Yahoo Fantasy Query for current season (2025)
+        # league_id is not needed for getting user's leagues
+        yahoo = get_yahoo_query(None, 'nba', 2025)
+
         # Get user's leagues
-        # This will trigger OAuth flow if not already authenticated
         user_leagues = yahoo.get_all_user_leagues()
 
         if not user_leagues or len(user_leagues) == 0:
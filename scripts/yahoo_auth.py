@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Yahoo OAuth 共用設定 - 讓各個腳本重用已儲存的 access token
+
+第一次授權後，yfpy 會把 token 寫入 scripts/.yahoo_oauth/.env，
+之後執行時直接讀取（過期時自動 refresh），不需要再開瀏覽器。
+"""
+
+import os
+import sys
+import functools
+from pathlib import Path
+
+from yfpy.query import YahooFantasySportsQuery
+from dotenv import load_dotenv
+
+# 載入環境變數
+load_dotenv()
+
+# Yahoo API 設定
+YAHOO_CLIENT_ID = os.getenv('YAHOO_CLIENT_ID')
+YAHOO_CLIENT_SECRET = os.getenv('YAHOO_CLIENT_SECRET')
+
+# Token 儲存位置（內含憑證，不可提交到版本控制）
+YAHOO_TOKEN_DIR = Path(__file__).resolve().parent / '.yahoo_oauth'
+
+
+def has_saved_token() -> bool:
+    """是否已有儲存的 Yahoo access token"""
+    return (YAHOO_TOKEN_DIR / '.env').is_file()
+
+
+@functools.lru_cache(maxsize=None)
+def get_yahoo_query(league_id: str, game_code: str = 'nba', game_id: int = 2025) -> YahooFantasySportsQuery:
+    """
+    取得 Yahoo Fantasy Query（同一組參數在同一個程序內只建立一次）
+
+    Args:
+        league_id: Yahoo 聯盟 ID
+        game_code: 運動類別代碼 (nba, nfl, mlb, nhl)
+        game_id: 賽季年份
+
+    Returns:
+        YahooFantasySportsQuery
+    """
+    YAHOO_TOKEN_DIR.mkdir(parents=True, exist_ok=True)
+
+    return YahooFantasySportsQuery(
+        league_id=league_id,
+        game_code=game_code,
+        game_id=game_id,
+        yahoo_consumer_key=YAHOO_CLIENT_ID,
+        yahoo_consumer_secret=YAHOO_CLIENT_SECRET,
+        env_file_location=YAHOO_TOKEN_DIR,
+        save_token_data_to_env_file=True,
+        # 重試交給 urllib3 Retry 與呼叫端處理（yfpy 的重試計數由所有執行緒共用且不受限速器控制）
+        retries=0,
+        # 非互動環境（cron 等）無法開啟瀏覽器
+        browser_callback=sys.stdin.isatty()
+    )
@@ -40,6 +40,22 @@ CREATE TRIGGER update_player_game_logs_updated_at
   FOR EACH ROW
   EXECUTE FUNCTION update_updated_at_column();
 
+-- Player directory: one row per player, join on player_key for names
+CREATE TABLE IF NOT EXISTS players (
+  player_key TEXT PRIMARY KEY,
+  player_name TEXT NOT NULL,
+  team TEXT,
+  positions JSONB,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Trigger to automatically update updated_at
+CREATE TRIGGER update_players_updated_at
+  BEFORE UPDATE ON players
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
 -- Optional: Add Row Level Security (RLS) policies
 -- Uncomment if you want to enable RLS
 -- ALTER TABLE player_game_logs ENABLE ROW LEVEL SECURITY;